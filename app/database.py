@@ -2,6 +2,7 @@ import sqlite3
 import os
 import pytz
 import logging
+import threading
 import operator  # Safer condition handling
 from datetime import datetime
 
@@ -22,7 +23,7 @@ logging.basicConfig(filename="database.log", level=logging.INFO, format="%(ascti
 # Get the absolute path of the project root
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  
 DB_DIR = os.path.join(BASE_DIR, "../data")  
-DB_PATH = os.path.join(DB_DIR, "housing.db")  
+DB_PATH = os.environ.get("HOUSING_DB_PATH", os.path.join(DB_DIR, "housing.db"))  # Override e.g. for benchmarks
 
 def create_database():
     """Creates the SQLite database and required tables if they do not exist."""
@@ -176,8 +177,18 @@ def generate_location_trends(start_zip=98001, end_zip=99001):
 
     return location_trends
 
-# Precompute location trends
-location_trends = generate_location_trends()
+# Location trends are generated on first use (or once in the gunicorn master when preloading,
+# so every worker shares the same trends instead of each drawing its own random ones)
+location_trends = None
+location_trends_lock = threading.Lock()
+
+def get_location_trends():
+    """Returns the ZIP-based market trends, generating them on first call."""
+    global location_trends
+    with location_trends_lock:
+        if location_trends is None:
+            location_trends = generate_location_trends()
+    return location_trends
 
 def get_recommendations(purpose, user_features):
     """Generates recommendations based on user features and dynamic trends."""
@@ -201,6 +212,7 @@ def get_recommendations(purpose, user_features):
         # Market-based recommendations (ZIP trends)
         if "zipcode" in user_features:
             zip_code = str(user_features["zipcode"])
+            location_trends = get_location_trends()
             if zip_code in location_trends:
                 trends = location_trends[zip_code]
                 recommendations.extend(trends["suggestions"])
@@ -2,13 +2,36 @@ import csv
 import os
 from flask import render_template, request, flash, jsonify, Response
 from app import app
-from model.predict import predict_price  # Import the predict function
+from model.predict import predict_price, explain_price  # Import the predict and explain functions
 from config import Config  # Import the Config class to access config settings
 from app.database import insert_query, get_all_queries, get_recommendations  # Import necessary functions
 
 import logging
 logging.basicConfig(level=logging.DEBUG)  # Set logging level to DEBUG for development
 
+# ------------------- INPUT PARSING -------------------
+def parse_features(data):
+    """
+    Parses the 7 model inputs from a JSON request body. Raises KeyError for a missing field
+    and ValueError for a non-numeric one.
+    """
+    return {
+        "sqft_living": float(data['sqft_living']),
+        "no_of_bedrooms": int(data['no_of_bedrooms']),
+        "no_of_bathrooms": float(data['no_of_bathrooms']),  # Allow decimals for bathrooms
+        "sqft_lot": float(data['sqft_lot']),
+        "no_of_floors": int(data['no_of_floors']),
+        "house_age": int(data['house_age']),
+        "zipcode": data['zipcode']
+    }
+
+def zipcode_error(zipcode):
+    """Returns an error message if the zipcode is outside the range defined in config.py, else None."""
+    min_zipcode, max_zipcode = Config.ZIPCODE_RANGE
+    if not (min_zipcode <= int(zipcode) <= max_zipcode):
+        return f"Invalid zipcode. It should be between {min_zipcode} and {max_zipcode}."
+    return None
+
 # ------------------- HOME PAGE ROUTE -------------------
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -23,21 +46,15 @@ def index():
 
         try:
             # Get the input data from the request (parse bathrooms as float)
-            sqft_living = float(data['sqft_living'])
-            no_of_bedrooms = int(data['no_of_bedrooms'])
-            no_of_bathrooms = float(data['no_of_bathrooms'])  # Allow decimals for bathrooms
-            sqft_lot = float(data['sqft_lot'])
-            no_of_floors = int(data['no_of_floors'])
-            house_age = int(data['house_age'])
-            zipcode = data['zipcode']
+            features = parse_features(data)
+            zipcode = features['zipcode']
             purpose = data['purpose']  # Capture the purpose (buy/sell)
             
-            app.logger.debug(f"Parsed input data: sqft_living={sqft_living}, no_of_bedrooms={no_of_bedrooms}, no_of_bathrooms={no_of_bathrooms}, sqft_lot={sqft_lot}, no_of_floors={no_of_floors}, house_age={house_age}, zipcode={zipcode}, purpose={purpose}")
+            app.logger.debug(f"Parsed input data: {features}, purpose={purpose}")
 
             # Validate the zipcode against the range defined in config.py
-            min_zipcode, max_zipcode = Config.ZIPCODE_RANGE
-            if not (min_zipcode <= int(zipcode) <= max_zipcode):
-                error_msg = f"Invalid zipcode. It should be between {min_zipcode} and {max_zipcode}."
+            error_msg = zipcode_error(zipcode)
+            if error_msg:
                 app.logger.error(error_msg)
                 if request.is_json:
                     return jsonify({'error': error_msg}), 400
@@ -45,21 +62,18 @@ def index():
                     flash(error_msg, "danger")
                     return render_template('index.html')
 
-            # Prepare the features for prediction
-            features = {
-                "sqft_living": sqft_living,
-                "no_of_bedrooms": no_of_bedrooms,
-                "no_of_bathrooms": no_of_bathrooms,
-                "sqft_lot": sqft_lot,
-                "no_of_floors": no_of_floors,
-                "house_age": house_age,
-                "zipcode": zipcode
-            }
-            
             app.logger.debug(f"Features prepared for prediction: {features}")
 
-            # Get the predicted price and confidence interval
-            predicted_price, confidence_interval, recommendations = predict_price(features, purpose)
+            # Explanations are opt-in (a JSON true, not just any truthy value) since they are much
+            # slower than the prediction itself; the web form fetches them separately via /explain
+            explain = data.get('explain') is True
+            if explain and not Config.PREDICTION_EXPLANATIONS:
+                error_msg = "Price explanations are disabled on this server."
+                app.logger.error(error_msg)
+                return jsonify({'error': error_msg}), 403
+
+            # Get the predicted price, confidence interval and (if asked for) per-feature explanation
+            predicted_price, confidence_interval, recommendations, explanation = predict_price(features, purpose, explain=explain)
 
             app.logger.debug(f"Predicted price: {predicted_price}, Confidence interval: {confidence_interval}")
 
@@ -77,13 +91,7 @@ def index():
 
             # Store the prediction in the database
             insert_query(
-                sqft_living=sqft_living,
-                no_of_bedrooms=no_of_bedrooms,
-                no_of_bathrooms=no_of_bathrooms,
-                sqft_lot=sqft_lot,
-                no_of_floors=no_of_floors,
-                house_age=house_age,
-                zipcode=zipcode,
+                **features,
                 purpose=purpose,  # Add the purpose field here
                 predicted_price=predicted_price
             )
@@ -95,6 +103,7 @@ def index():
                     'predicted_price': predicted_price,
                     'confidence_interval': confidence_interval,
                     'recommendations': recommendations,
+                    'explanation': explanation,
                     'realtor_url': realtor_url
                 })
 
@@ -104,6 +113,7 @@ def index():
                                    confidence_interval=confidence_interval,
                                    features=features,
                                    recommendations=recommendations,  # Pass recommendations to the template
+                                   explanation=explanation,
                                    realtor_url=realtor_url)
         except ValueError as e:
             error_msg = f"Please enter valid numerical values for all fields. Error: {str(e)}"
@@ -121,6 +131,14 @@ def index():
             else:
                 flash(error_msg, "danger")
                 return render_template('index.html')
+        except TimeoutError as e:
+            error_msg = f"The prediction service is busy, please try again. Error: {str(e)}"
+            app.logger.error(error_msg)
+            if request.is_json:
+                return jsonify({'error': error_msg}), 503
+            else:
+                flash(error_msg, "danger")
+                return render_template('index.html')
         except Exception as e:
             error_msg = f"An unexpected error occurred: {str(e)}"
             app.logger.error(error_msg)
@@ -133,6 +151,45 @@ def index():
     # For GET requests, simply render the page
     return render_template('index.html')
 
+# ------------------- PRICE EXPLANATION -------------------
+@app.route('/explain', methods=['POST'])
+def explain():
+    """
+    Explains a prediction: how much each input moved the price away from a typical home.
+    Kept separate from the prediction itself because it costs far more, so it only runs when
+    a user asks for it. Nothing is stored in the database.
+    """
+    if not request.is_json:
+        app.logger.error("Invalid request format: Expected JSON")
+        return jsonify({'error': 'Invalid request format'}), 400
+    if not Config.PREDICTION_EXPLANATIONS:
+        error_msg = "Price explanations are disabled on this server."
+        app.logger.error(error_msg)
+        return jsonify({'error': error_msg}), 403
+
+    try:
+        features = parse_features(request.get_json())
+        error_msg = zipcode_error(features['zipcode'])
+        if error_msg:
+            app.logger.error(error_msg)
+            return jsonify({'error': error_msg}), 400
+
+        explanation = explain_price(features)
+        app.logger.debug(f"Explanation: {explanation}")
+        return jsonify({'explanation': explanation})
+    except ValueError as e:
+        error_msg = f"Please enter valid numerical values for all fields. Error: {str(e)}"
+        app.logger.error(error_msg)
+        return jsonify({'error': error_msg}), 400
+    except KeyError as e:
+        error_msg = f"Missing required field: {str(e)}"
+        app.logger.error(error_msg)
+        return jsonify({'error': error_msg}), 400
+    except Exception as e:
+        error_msg = f"An unexpected error occurred: {str(e)}"
+        app.logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
 # ------------------- NEW ADMIN PAGE -------------------
 @app.route('/admin')
 def admin_dashboard():
@@ -265,12 +265,66 @@ function displayResult(result, inputData) {
     <p>View properties in your area on <a href="${result.realtor_url}" target="_blank">Realtor.com</a>.</p>
   `;
 
+  // The price explanation is fetched only when the user asks for it, since it is much slower than the prediction
+  const explanationContainer = document.getElementById('explanation-container');
+  const explainButton = document.getElementById('explain-btn');
+  explanationContainer.innerHTML = '';
+  explainButton.classList.remove('hidden');
+  explainButton.onclick = () => fetchExplanation(inputData);
+
   // Hide the form section and show the result section
   document.getElementById('form-section').classList.add('hidden');
   resultSection.classList.remove('hidden');
   resultSection.scrollIntoView({ behavior: 'smooth' });
 }
 
+/*
+     Fetch and Display the Price Explanation ("Why this price?")
+*/
+function fetchExplanation(inputData) {
+  const explainButton = document.getElementById('explain-btn');
+  explainButton.disabled = true;
+
+  fetch('/explain', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(inputData)
+  })
+  .then(response => {
+    if (!response.ok) {
+      throw new Error(`HTTP Error ${response.status}`);
+    }
+    return response.json();
+  })
+  .then(result => {
+    displayExplanation(result.explanation);
+    explainButton.classList.add('hidden');
+  })
+  .catch(error => {
+    console.error("Error fetching explanation:", error);
+    alert("The price explanation is not available right now. Please try again later.");
+  })
+  .finally(() => {
+    explainButton.disabled = false;
+  });
+}
+
+// Show how much each input moved the price away from a typical home
+function displayExplanation(explanation) {
+  const labels = {
+    sqft_living: 'Living area', no_of_bedrooms: 'Bedrooms', no_of_bathrooms: 'Bathrooms',
+    sqft_lot: 'Lot size', no_of_floors: 'Floors', house_age: 'House age', zipcode: 'Zipcode'
+  };
+  const effects = Object.entries(explanation.feature_effects)
+    .sort((a, b) => Math.abs(b[1]) - Math.abs(a[1]))
+    .map(([feature, effect]) => `<li>${labels[feature] || feature}: ${effect >= 0 ? '+' : ''}${effect}%</li>`)
+    .join('');
+  document.getElementById('explanation-container').innerHTML = `
+    <p>Compared with a typical home (<strong>$${Math.round(explanation.base_price).toLocaleString()}</strong>), each detail changed the estimate by:</p>
+    <ul>${effects}</ul>
+  `;
+}
+
 /* ===============================
      Prediction History Logic
   =============================== */
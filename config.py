@@ -16,7 +16,29 @@ class Config:
     ENCODER_PATH = 'model/saved_model/encoder.pkl'
     POLY_PATH = 'model/saved_model/poly.pkl'
 
-    
+    # Serving: load the app, model and trends once in the gunicorn master and share them with forked workers
+    SERVE_PRELOAD = os.environ.get('SERVE_PRELOAD', '1') == '1'  # Set to '0' to load everything separately in each worker
+
+    # Data preparation paths (see model/preprocess.py)
+    RAW_DATA_PATH = 'data/raw/rates_filtered.csv'
+    PROCESSED_DATA_PATH = 'data/processed/cleaned_dataset_iqr.csv'
+    DATA_CACHE_DIR = 'data/processed/cache'  # Columnar .npy cache, one sub-folder per raw file hash
+    DATA_CHUNK_ROWS = 100_000  # Rows parsed per chunk, keeps memory flat for raw files larger than RAM
+
+    # Per-feature price explanations (LightGBM pred_contrib, collapsed back to the 7 raw inputs).
+    # They cost ~4 ms per row vs ~50 us for a prediction, so they are only computed on request:
+    # POST /explain (the "Why this price?" button) or "explain": true in a JSON prediction request
+    PREDICTION_EXPLANATIONS = os.environ.get('PREDICTION_EXPLANATIONS', '1') == '1'  # Set to '0' to refuse them (HTTP 403)
+
+    # Micro-batching for concurrent single predictions. Only pays off when a worker serves several
+    # requests at once, so gunicorn.conf.py switches to threaded workers (SERVE_THREADS) when it is on
+    PREDICTION_BATCHING = os.environ.get('PREDICTION_BATCHING', '0') == '1'  # Set to '1' to batch concurrent requests
+    SERVE_THREADS = int(os.environ.get('SERVE_THREADS', 16))  # Threads per gunicorn worker when batching is on
+    BATCH_MAX_ROWS = int(os.environ.get('BATCH_MAX_ROWS', 64))  # Flush the batch once this many rows are waiting
+    BATCH_WINDOW_MS = float(os.environ.get('BATCH_WINDOW_MS', 5))  # Max time to wait for more rows before flushing
+    BATCH_TIMEOUT_S = float(os.environ.get('BATCH_TIMEOUT_S', 2))  # Per-request timeout while waiting on a batch
+
+
 
   
 
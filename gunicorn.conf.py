@@ -0,0 +1,52 @@
+import gc
+import logging
+from config import Config  # Import the Config class
+
+# With preloading, run:app is imported once in the master and workers are forked from it.
+# The model, encoder, poly and location trends are loaded there too, so their memory is
+# shared copy-on-write between workers instead of being loaded again by every worker.
+# Worker count comes from WEB_CONCURRENCY or --workers as usual.
+preload_app = Config.SERVE_PRELOAD
+
+# Sync workers handle one request at a time, so a batch could never fill and every request would
+# just wait out BATCH_WINDOW_MS. Batching is therefore paired with threaded (gthread) workers.
+if Config.PREDICTION_BATCHING:
+    worker_class = "gthread"
+    threads = Config.SERVE_THREADS
+
+
+def load_on_one_openmp_thread(load):
+    """
+    Runs `load` with LightGBM capped at one OpenMP thread.
+
+    Unpickling the booster runs OpenMP code, which would otherwise start a pool of
+    OMP_NUM_THREADS threads in the master, and libgomp is not safe to use in a child forked
+    after its pool started. With the cap no pool is created; lifting it afterwards only
+    resets a setting, so the forked workers start their own pool with the normal thread count.
+    """
+    import ctypes
+    from lightgbm.basic import _LIB, _safe_call  # LGBM_SetMaxThreads has no public Python wrapper
+
+    _safe_call(_LIB.LGBM_SetMaxThreads(ctypes.c_int(1)))
+    try:
+        load()
+    finally:
+        _safe_call(_LIB.LGBM_SetMaxThreads(ctypes.c_int(-1)))  # -1: back to LightGBM's default
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before any worker is forked."""
+    if not preload_app:
+        return
+
+    from model.predict import load_artifacts
+    from app.database import get_location_trends
+
+    # Load only, with no OpenMP threads, so the master stays safe to fork (see load_on_one_openmp_thread)
+    load_on_one_openmp_thread(load_artifacts)
+    get_location_trends()
+
+    # Move everything allocated so far out of the GC's reach: collections in the workers would
+    # otherwise write to these objects' headers and un-share the pages they live on
+    gc.freeze()
+    logging.info("Model and location trends preloaded in the gunicorn master.")
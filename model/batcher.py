@@ -0,0 +1,88 @@
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent single-row predictions into one batched model call.
+
+    Request threads hand in their preprocessed feature row and block on a Future.
+    A background thread collects rows until either `max_rows` are waiting or
+    `window_ms` has passed since the first one arrived, runs `predict_fn` once on
+    the stacked rows and hands each result back to its caller.
+    """
+
+    def __init__(self, predict_fn, max_rows=64, window_ms=5, timeout_s=2):
+        self.predict_fn = predict_fn
+        self.max_rows = max_rows
+        self.window_s = window_ms / 1000.0
+        self.timeout_s = timeout_s
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Start the worker on first use so it lives in the process that serves requests
+        # (threads do not survive a fork, e.g. gunicorn workers forked from the master)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="prediction-batcher", daemon=True)
+                self._thread.start()
+                logging.debug("Prediction batcher started.")
+
+    def submit(self, row, timeout=None):
+        """Queues one preprocessed row (shape (1, n_features)) and waits for its prediction."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((row, future))
+        timeout = self.timeout_s if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Drop the row if it has not been picked up yet so the batch does not waste work on it
+            future.cancel()
+            error_msg = f"Prediction timed out after {timeout}s waiting for a batch."
+            logging.error(error_msg)
+            raise TimeoutError(error_msg)
+
+    def _collect(self):
+        # Block for the first row, then keep filling the batch until it is full or the window closes
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window_s
+        while len(batch) < self.max_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # Skip requests that already timed out; mark the rest as running so they can no longer be cancelled
+            batch = [(row, future) for row, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                rows = np.vstack([row for row, _ in batch])
+                predictions = self.predict_fn(rows)
+                logging.debug(f"Batched prediction for {len(batch)} row(s).")
+                for (_, future), prediction in zip(batch, predictions):
+                    future.set_result(prediction)
+            except Exception as e:
+                logging.error(f"Error in batched prediction: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
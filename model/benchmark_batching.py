@@ -0,0 +1,73 @@
+"""
+Benchmark: per-request model.predict vs. the micro-batcher under concurrent load.
+
+Run from the project root:
+    python -m model.benchmark_batching
+"""
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import app  # Import the app first, as routes.py does, to avoid the app <-> model.predict circular import
+from model.predict import preprocess_features, predict_log_prices, batcher
+
+logging.getLogger().setLevel(logging.WARNING)  # predict.py logs every step at DEBUG, which would dominate the timings
+
+CLIENT_COUNTS = [8, 32, 128]
+REQUESTS_PER_CLIENT = 50
+
+
+def random_features():
+    return {
+        "sqft_living": random.randint(800, 4000),
+        "no_of_bedrooms": random.randint(1, 6),
+        "no_of_bathrooms": random.choice([1.0, 1.5, 2.0, 2.5, 3.0]),
+        "sqft_lot": random.randint(2000, 15000),
+        "no_of_floors": random.choice([1, 2, 3]),
+        "house_age": random.randint(0, 100),
+        "zipcode": random.choice(["98103", "98115", "98125", "98178", "98052"])
+    }
+
+
+def predict_direct(row):
+    return predict_log_prices(row)[0]
+
+
+def predict_batched(row):
+    return batcher.submit(row)
+
+
+def run(predict_fn, rows, clients):
+    latencies = []
+
+    def one_client(client_rows):
+        for row in client_rows:
+            start = time.perf_counter()
+            predict_fn(row)
+            latencies.append(time.perf_counter() - start)
+
+    chunks = [rows[i::clients] for i in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(one_client, chunks))
+    elapsed = time.perf_counter() - start
+    return len(rows) / elapsed, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+
+
+if __name__ == "__main__":
+    random.seed(42)
+
+    # Preprocessing is the same on both paths, so do it up front and time only the model call
+    rows = [preprocess_features(random_features()) for _ in range(max(CLIENT_COUNTS) * REQUESTS_PER_CLIENT)]
+
+    print(f"{'clients':>8} {'mode':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for clients in CLIENT_COUNTS:
+        client_rows = rows[:clients * REQUESTS_PER_CLIENT]
+        direct = run(predict_direct, client_rows, clients)
+        batched = run(predict_batched, client_rows, clients)
+        for mode, (throughput, p50, p99) in (("direct", direct), ("batched", batched)):
+            print(f"{clients:>8} {mode:>8} {throughput:>10.0f} {p50:>8.2f} {p99:>8.2f}")
+        print(f"{'':>8} speedup: {batched[0] / direct[0]:.2f}x")
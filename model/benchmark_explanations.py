@@ -0,0 +1,45 @@
+"""
+Benchmark: per-row cost of explanations (pred_contrib + folding onto the raw inputs) vs. plain predict.
+
+Run from the project root:
+    python -m model.benchmark_explanations
+"""
+import time
+import random
+import logging
+
+import numpy as np
+
+import app  # Import the app first, as routes.py does, to avoid the app <-> model.predict circular import
+from model.predict import preprocess_features, predict_log_prices, explain_log_prices, summarize_explanation
+from model.benchmark_batching import random_features
+
+logging.getLogger().setLevel(logging.WARNING)  # predict.py logs every step at DEBUG, which would dominate the timings
+
+BATCH_SIZES = [1, 8, 64]
+REPEATS = 20
+
+
+def per_row_us(fn, rows):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(rows)
+    return (time.perf_counter() - start) / (REPEATS * len(rows)) * 1e6
+
+
+def explain_and_summarize(rows):
+    return [summarize_explanation(row) for row in explain_log_prices(rows)]
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    rows = np.vstack([preprocess_features(random_features()) for _ in range(max(BATCH_SIZES))])
+
+    # Contributions must add back up to the model's own prediction
+    assert np.allclose(explain_log_prices(rows).sum(axis=1), predict_log_prices(rows))
+
+    print(f"{'batch':>6} {'predict us/row':>15} {'explain us/row':>15} {'added us/row':>13}")
+    for size in BATCH_SIZES:
+        predict_cost = per_row_us(predict_log_prices, rows[:size])
+        explain_cost = per_row_us(explain_and_summarize, rows[:size])
+        print(f"{size:>6} {predict_cost:>15.0f} {explain_cost:>15.0f} {explain_cost - predict_cost:>13.0f}")
@@ -0,0 +1,122 @@
+"""
+Benchmark: per-worker memory and time-to-first-request under gunicorn, with and without preloading.
+
+Starts `gunicorn -c gunicorn.conf.py run:app` for 1, 4 and 16 workers in each mode, waits for the
+first successful prediction, sends enough predictions for every worker to have loaded the model,
+then reads each worker's unique set size (USS: private pages only) from /proc. Linux only.
+Predictions go to a throwaway SQLite database, not data/housing.db.
+
+Run from the project root:
+    python -m model.benchmark_serving
+"""
+import os
+import sys
+import time
+import json
+import signal
+import tempfile
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+WORKER_COUNTS = [1, 4, 16]
+PORT = 8765
+STARTUP_TIMEOUT_S = 300
+
+FEATURES = {
+    "sqft_living": 1800, "no_of_bedrooms": 3, "no_of_bathrooms": 2, "sqft_lot": 5000,
+    "no_of_floors": 1, "house_age": 30, "zipcode": "98103", "purpose": "buy"
+}
+
+
+def post_prediction(timeout=60):
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{PORT}/", data=json.dumps(FEATURES).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return response.status
+
+
+def smaps_kb(pid, fields):
+    # smaps_rollup sums every mapping of the process; values are in kB
+    totals = dict.fromkeys(fields, 0)
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in totals:
+                totals[name] = int(rest.split()[0])
+    return totals
+
+
+def uss_mb(pid):
+    mem = smaps_kb(pid, ("Private_Clean", "Private_Dirty"))
+    return (mem["Private_Clean"] + mem["Private_Dirty"]) / 1024
+
+
+def rss_mb(pid):
+    return smaps_kb(pid, ("Rss",))["Rss"] / 1024
+
+
+def thread_count(pid):
+    with open(f"/proc/{pid}/status") as f:
+        return int(next(line for line in f if line.startswith("Threads:")).split()[1])
+
+
+def worker_pids(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def run(workers, preload, db_path):
+    env = dict(os.environ, SERVE_PRELOAD="1" if preload else "0", HOUSING_DB_PATH=db_path)
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-w", str(workers),
+         "-b", f"127.0.0.1:{PORT}", "--timeout", "300", "--log-level", "warning", "run:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        # Time until the first prediction succeeds (includes master/worker start-up and model loading)
+        while True:
+            if time.perf_counter() - start > STARTUP_TIMEOUT_S:
+                raise RuntimeError(f"gunicorn did not answer within {STARTUP_TIMEOUT_S}s")
+            try:
+                if post_prediction(timeout=STARTUP_TIMEOUT_S) == 200:
+                    break
+            except OSError:
+                time.sleep(0.1)
+        first_request_s = time.perf_counter() - start
+
+        # Spread enough concurrent predictions that every worker has served (and loaded the model)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda _: post_prediction(timeout=STARTUP_TIMEOUT_S), range(workers * 8)))
+
+        pids = worker_pids(server.pid)
+        worker_uss = [uss_mb(pid) for pid in pids]
+        worker_rss = [rss_mb(pid) for pid in pids]
+        return {
+            "first_request_s": first_request_s,
+            "uss_mb": sum(worker_uss) / len(worker_uss),
+            "rss_mb": sum(worker_rss) / len(worker_rss),
+            "master_rss_mb": rss_mb(server.pid),
+            "master_threads": thread_count(server.pid),  # Must stay 1 when preloading: forking after OpenMP starts is unsafe
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "housing.db")
+        os.environ["HOUSING_DB_PATH"] = db_path
+        from app.database import create_database
+        create_database()
+
+        print(f"{'workers':>8} {'mode':>8} {'first req s':>12} {'worker USS MB':>14} {'worker RSS MB':>14} {'master RSS MB':>14} {'master threads':>15}")
+        for workers in WORKER_COUNTS:
+            for preload in (False, True):
+                result = run(workers, preload, db_path)
+                print(f"{workers:>8} {'preload' if preload else 'lazy':>8} {result['first_request_s']:>12.2f} "
+                      f"{result['uss_mb']:>14.1f} {result['rss_mb']:>14.1f} {result['master_rss_mb']:>14.1f} {result['master_threads']:>15}")
@@ -1,9 +1,8 @@
-import joblib
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import OneHotEncoder, PolynomialFeatures
+import threading
 from config import Config  # Import from the config file
 from app.database import insert_query, get_recommendations  # Import the functions to store predictions and get recommendations
+from model.batcher import PredictionBatcher
 import logging
 
 # Set up logging
@@ -14,18 +13,74 @@ model_path = Config.MODEL_PATH
 encoder_path = Config.ENCODER_PATH
 poly_path = Config.POLY_PATH
 
-# Load the saved model, encoder, and poly using joblib
-try:
-    model = joblib.load(model_path)
-    encoder = joblib.load(encoder_path)
-    poly = joblib.load(poly_path)
-    logging.debug("Model, encoder, and polynomial features loaded successfully.")
-except Exception as e:
-    logging.error(f"Error loading model, encoder, or polynomial features: {str(e)}")
-    raise
+# The model, encoder and poly are loaded on first use (see load_artifacts), so importing this
+# module - and therefore the app - does not pull in pandas, sklearn and lightgbm
+model = None
+encoder = None
+poly = None
+contribution_map = None
+load_lock = threading.Lock()
+
+# Serialises calls into the shared LightGBM booster across request threads
+# (the fitted encoder and poly are only read at predict time, so they need no lock)
+model_lock = threading.Lock()
+
+# The 7 inputs a user provides, in the order explanations are reported
+RAW_FEATURES = ["sqft_living", "no_of_bedrooms", "no_of_bathrooms", "sqft_lot", "no_of_floors", "house_age", "zipcode"]
+
+
+# Function to build the sparse matrix that folds polynomial-feature contributions back onto the raw inputs
+def build_contribution_map(poly):
+    """
+    Returns a sparse (n_poly_features, 7) matrix built from poly.get_feature_names_out().
+    Each term's contribution is split across the raw inputs it is made of, in proportion to
+    their exponents: 'sqft_living^2' goes fully to sqft_living, 'sqft_living zipcode_98103'
+    half to sqft_living and half to zipcode. All zipcode_* columns belong to zipcode.
+    """
+    raw_index = {name: i for i, name in enumerate(RAW_FEATURES)}
+    rows, cols, weights = [], [], []
+    for term_index, term in enumerate(poly.get_feature_names_out()):
+        factors = []
+        for factor in term.split(" "):
+            name, _, power = factor.partition("^")
+            raw_name = "zipcode" if name.startswith("zipcode_") else name
+            factors.append((raw_index[raw_name], int(power or 1)))
+        degree = sum(power for _, power in factors)
+        for raw_i, power in factors:
+            rows.append(term_index)
+            cols.append(raw_i)
+            weights.append(power / degree)
+    # Duplicate (row, col) pairs, e.g. 'zipcode_98001 zipcode_98002', are summed on conversion
+    from scipy import sparse
+    return sparse.csr_matrix((weights, (rows, cols)), shape=(poly.n_output_features_, len(RAW_FEATURES)))
+
+
+# Function to load the saved model, encoder and poly (once per process, or once in the gunicorn master when preloading)
+def load_artifacts():
+    global model, encoder, poly, contribution_map
+    if model is not None:
+        return
+    with load_lock:
+        if model is not None:
+            return
+        try:
+            import joblib  # Deferred along with the sklearn/lightgbm imports that unpickling triggers
+            loaded_encoder = joblib.load(encoder_path)
+            loaded_poly = joblib.load(poly_path)
+            loaded_map = build_contribution_map(loaded_poly)
+            loaded_model = joblib.load(model_path)
+        except Exception as e:
+            logging.error(f"Error loading model, encoder, or polynomial features: {str(e)}")
+            raise
+        encoder, poly, contribution_map = loaded_encoder, loaded_poly, loaded_map
+        model = loaded_model  # Assigned last: `model is not None` means everything is ready
+        logging.debug("Model, encoder, and polynomial features loaded successfully.")
+
 
 # Function to preprocess features for prediction
 def preprocess_features(features):
+    import pandas as pd  # Deferred so importing the app stays cheap
+    load_artifacts()
     try:
         # Convert the input data to a DataFrame
         input_data = pd.DataFrame([features])
@@ -51,8 +106,61 @@ def preprocess_features(features):
         raise
 
 
-# Function to predict price and fetch recommendations (no DB insert here)
-def predict_price(features, purpose):
+# Function to run the model on a batch of preprocessed rows (log-scale prices)
+def predict_log_prices(processed_rows):
+    load_artifacts()
+    with model_lock:
+        return model.predict(processed_rows)
+
+
+# Function to run the model on a batch of preprocessed rows and explain each prediction
+def explain_log_prices(processed_rows):
+    """
+    Returns an (n_rows, 8) array: the log-scale contribution of each raw input followed by
+    the model's base value. Each row sums to the log-scale prediction, so no separate
+    model.predict call is needed.
+    """
+    load_artifacts()
+    with model_lock:
+        contributions = model.predict(processed_rows, pred_contrib=True)
+    # Last column is the base value (expected prediction); the rest are per polynomial feature
+    raw_contributions = np.asarray((contribution_map.T @ contributions[:, :-1].T).T)
+    return np.column_stack([raw_contributions, contributions[:, -1]])
+
+
+# Function to turn one row of explain_log_prices output into a response-friendly explanation
+def summarize_explanation(explained_row):
+    # Contributions are additive in log-price, so each one multiplies the price by exp(contribution)
+    return {
+        "base_price": float(np.expm1(explained_row[-1])),
+        "feature_effects": {
+            feature: round(float(np.expm1(contribution)) * 100, 2)  # % change in price due to this input
+            for feature, contribution in zip(RAW_FEATURES, explained_row[:-1])
+        }
+    }
+
+
+# Function to explain the price of one house (used by the /explain route, on demand only)
+def explain_price(features):
+    try:
+        processed_features = preprocess_features(features)
+        return summarize_explanation(explain_log_prices(processed_features)[0])
+    except Exception as e:
+        logging.error(f"Error in explain_price function: {str(e)}")
+        raise
+
+
+# Coalesces concurrent single predictions into one model.predict call
+batcher = PredictionBatcher(
+    predict_log_prices,
+    max_rows=Config.BATCH_MAX_ROWS,
+    window_ms=Config.BATCH_WINDOW_MS,
+    timeout_s=Config.BATCH_TIMEOUT_S
+)
+
+
+# Function to predict price, optionally explain it, and fetch recommendations (no DB insert here)
+def predict_price(features, purpose, explain=False):
     try:
         logging.debug(f"Received features for prediction: {features}")
         logging.debug(f"Purpose: {purpose}")
@@ -61,9 +169,21 @@ def predict_price(features, purpose):
         processed_features = preprocess_features(features)
         logging.debug(f"Processed features: {processed_features}")
 
-        # Predict using the trained model
-        predicted_price_log = model.predict(processed_features)
+        if explain:
+            # pred_contrib costs far more than predict, so only requests that ask for an explanation
+            # pay for it; they skip the batcher and take the prediction from the contributions' sum
+            explained_row = explain_log_prices(processed_features)[0]
+            predicted_price_log = np.array([explained_row.sum()])
+            explanation = summarize_explanation(explained_row)
+        elif Config.PREDICTION_BATCHING:
+            # Batched with other concurrent requests
+            predicted_price_log = np.array([batcher.submit(processed_features)])
+            explanation = None
+        else:
+            predicted_price_log = predict_log_prices(processed_features)
+            explanation = None
         logging.debug(f"Predicted price (log scale): {predicted_price_log}")
+        logging.debug(f"Explanation: {explanation}")
 
         # Inverse log transformation to get actual price
         predicted_price = np.expm1(predicted_price_log)
@@ -82,7 +202,7 @@ def predict_price(features, purpose):
         logging.debug(f"Recommendations: {recommendations}")
 
         # Return prediction results (no database write here)
-        return predicted_price[0], (ci_min[0], ci_max[0]), recommendations
+        return predicted_price[0], (ci_min[0], ci_max[0]), recommendations, explanation
 
     except Exception as e:
         logging.error(f"Error in predict_price function: {str(e)}")
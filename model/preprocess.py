@@ -0,0 +1,291 @@
+"""
+Scripted version of the data cleaning done in data/raw/cleani.ipynb.
+
+Streams the raw CSV in chunks, derives `house_age`, removes price outliers with the
+IQR rule (repeated until stable) and stores the result as one .npy file per column,
+with compact dtypes, under Config.DATA_CACHE_DIR/<hash of the raw file>/. Training loads that cache directly and
+only re-runs the pipeline when the raw file (or this pipeline) changes.
+
+Nothing here holds more than one chunk of the raw file in memory, so it scales to raw
+files much larger than RAM. Usage (from the project root):
+    python model/preprocess.py [--raw PATH] [--export-csv]
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Project root, for `python model/preprocess.py`
+from config import Config
+
+# Bump this whenever the cleaning logic changes so old caches are not reused
+PIPELINE_VERSION = "1"
+
+# Same reference year as the notebook used to derive house_age from yr_built
+CURRENT_YEAR = 2024
+
+# Output schema, in the same column order as cleaned_dataset_iqr.csv.
+# Price stays float64 since it is the training target; the features are downcast.
+COLUMN_DTYPES = {
+    "price": "float64",
+    "no_of_bedrooms": "int16",
+    "no_of_bathrooms": "float32",
+    "sqft_living": "int32",
+    "sqft_lot": "int32",
+    "no_of_floors": "float32",
+    "zipcode": "int32",
+    "house_age": "int16",
+}
+
+# Number of histogram bins used to locate the price quartiles without sorting the whole column
+QUANTILE_BINS = 1 << 16
+
+
+def file_hash(path, block_size=1 << 20):
+    """Returns a sha256 of the file contents and the pipeline version, used as the cache key."""
+    digest = hashlib.sha256(PIPELINE_VERSION.encode())
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_raw_chunks(raw_path, chunk_rows):
+    """Yields raw CSV chunks parsed straight into the compact output dtypes, with house_age derived."""
+    header = pd.read_csv(raw_path, nrows=0).columns
+    derive_age = "house_age" not in header
+    if derive_age and "yr_built" not in header:
+        raise ValueError(f"{raw_path} has neither a 'house_age' nor a 'yr_built' column")
+
+    dtypes = {col: dtype for col, dtype in COLUMN_DTYPES.items() if col != "house_age"}
+    if derive_age:
+        dtypes["yr_built"] = "int16"
+    else:
+        dtypes["house_age"] = COLUMN_DTYPES["house_age"]
+
+    for chunk in pd.read_csv(raw_path, usecols=list(dtypes), dtype=dtypes, chunksize=chunk_rows):
+        if derive_age:
+            chunk["house_age"] = (CURRENT_YEAR - chunk.pop("yr_built")).astype(COLUMN_DTYPES["house_age"])
+        yield chunk[list(COLUMN_DTYPES)]
+
+
+def iter_slices(n_rows, chunk_rows):
+    for start in range(0, n_rows, chunk_rows):
+        yield slice(start, min(start + chunk_rows, n_rows))
+
+
+def stage_columns(raw_path, staging_dir, chunk_rows):
+    """Parses the raw CSV once, appending each column to a flat binary file. Returns the memory-mapped columns."""
+    files = {col: open(os.path.join(staging_dir, f"{col}.bin"), "wb") for col in COLUMN_DTYPES}
+    n_rows = 0
+    try:
+        for chunk in read_raw_chunks(raw_path, chunk_rows):
+            for col, f in files.items():
+                f.write(chunk[col].to_numpy().tobytes())
+            n_rows += len(chunk)
+            logging.debug(f"Staged {n_rows} rows from {raw_path}")
+    finally:
+        for f in files.values():
+            f.close()
+
+    if n_rows == 0:
+        raise ValueError(f"{raw_path} contains no rows")
+
+    return {
+        col: np.memmap(os.path.join(staging_dir, f"{col}.bin"), dtype=dtype, mode="r", shape=(n_rows,))
+        for col, dtype in COLUMN_DTYPES.items()
+    }
+
+
+def iter_within(values, bounds, chunk_rows):
+    """Yields chunks of a memory-mapped column, keeping only the values within the (inclusive) bounds."""
+    lower, upper = bounds
+    for rows in iter_slices(len(values), chunk_rows):
+        chunk = np.asarray(values[rows])
+        yield chunk[(chunk >= lower) & (chunk <= upper)]
+
+
+def streaming_quantiles(values, quantiles, bounds, chunk_rows):
+    """
+    Exact quantiles of the values within `bounds`, matching pandas' default linear interpolation.
+
+    A histogram pass finds which bin holds each required order statistic; a second pass
+    collects only the values in those bins, which are then sorted to pick the exact element.
+    Returns the quantiles and the number of values they were computed over.
+    """
+    n_rows, lo, hi = 0, np.inf, -np.inf
+    for chunk in iter_within(values, bounds, chunk_rows):
+        if len(chunk):
+            n_rows += len(chunk)
+            lo, hi = min(lo, chunk.min()), max(hi, chunk.max())
+    if n_rows == 0:
+        raise ValueError("No values left to compute quantiles on")
+    if hi == lo:
+        return [float(lo) for _ in quantiles], n_rows
+
+    def bin_index(chunk):
+        idx = ((chunk - lo) / (hi - lo) * QUANTILE_BINS).astype(np.int64)
+        return np.clip(idx, 0, QUANTILE_BINS - 1)
+
+    counts = np.zeros(QUANTILE_BINS, dtype=np.int64)
+    for chunk in iter_within(values, bounds, chunk_rows):
+        counts += np.bincount(bin_index(chunk), minlength=QUANTILE_BINS)
+    cumulative = np.cumsum(counts)
+
+    # Each quantile interpolates between the order statistics at floor(h) and floor(h) + 1
+    positions = [(n_rows - 1) * q for q in quantiles]
+    ranks = sorted({r for h in positions for r in (int(h), min(int(h) + 1, n_rows - 1))})
+    rank_bins = {r: int(np.searchsorted(cumulative, r, side="right")) for r in ranks}
+
+    wanted = np.array(sorted(set(rank_bins.values())))
+    collected = {b: [] for b in wanted}
+    for chunk in iter_within(values, bounds, chunk_rows):
+        idx = bin_index(chunk)
+        hit = np.isin(idx, wanted)
+        for b in np.unique(idx[hit]):
+            collected[b].append(chunk[idx == b])
+    sorted_bins = {b: np.sort(np.concatenate(parts)) for b, parts in collected.items()}
+
+    def order_statistic(r):
+        b = rank_bins[r]
+        before = cumulative[b - 1] if b > 0 else 0
+        return float(sorted_bins[b][r - before])
+
+    results = []
+    for h in positions:
+        low = order_statistic(int(h))
+        high = order_statistic(min(int(h) + 1, n_rows - 1))
+        t = h - int(h)
+        # Same interpolation as numpy's "linear" method, so results match DataFrame.quantile bit for bit
+        results.append(high - (high - low) * (1 - t) if t >= 0.5 else low + (high - low) * t)
+    return results, n_rows
+
+
+def iqr_bounds(price, chunk_rows):
+    """
+    Repeats the IQR rule (1.5 * IQR beyond Q1 and Q3) until no more rows are removed.
+
+    This is what produced cleaned_dataset_iqr.csv: the notebook re-ran the filter on its own
+    output. Each round only narrows the bounds, so the rows kept after any round are simply
+    the prices within the latest bounds and nothing needs rewriting between rounds.
+    """
+    bounds = (-np.inf, np.inf)
+    rounds = []
+    while True:
+        (q1, q3), n_rows = streaming_quantiles(price, [0.25, 0.75], bounds, chunk_rows)
+        iqr = q3 - q1
+        new_bounds = (max(bounds[0], q1 - 1.5 * iqr), min(bounds[1], q3 + 1.5 * iqr))
+        n_kept = sum(len(chunk) for chunk in iter_within(price, new_bounds, chunk_rows))
+        rounds.append({"rows": n_rows, "price_q1": q1, "price_q3": q3, "price_bounds": list(new_bounds)})
+        logging.debug(f"IQR round {len(rounds)}: kept {n_kept} of {n_rows} rows")
+        bounds = new_bounds
+        if n_kept == n_rows:
+            return bounds, rounds
+
+
+def write_filtered(staged, n_rows, lower, upper, out_dir, chunk_rows):
+    """Writes the rows whose price is within [lower, upper] as one .npy file per column."""
+    price = staged["price"]
+    n_kept = 0
+    for rows in iter_slices(n_rows, chunk_rows):
+        chunk = price[rows]
+        n_kept += int(np.count_nonzero((chunk >= lower) & (chunk <= upper)))
+
+    outputs = {
+        col: np.lib.format.open_memmap(os.path.join(out_dir, f"{col}.npy"), mode="w+", dtype=dtype, shape=(n_kept,))
+        for col, dtype in COLUMN_DTYPES.items()
+    }
+    written = 0
+    for rows in iter_slices(n_rows, chunk_rows):
+        chunk = price[rows]
+        mask = (chunk >= lower) & (chunk <= upper)
+        kept = int(np.count_nonzero(mask))
+        for col, out in outputs.items():
+            out[written:written + kept] = staged[col][rows][mask]
+        written += kept
+    for out in outputs.values():
+        out.flush()
+    return n_kept
+
+
+def prepare_dataset(raw_path=Config.RAW_DATA_PATH, cache_dir=Config.DATA_CACHE_DIR, chunk_rows=Config.DATA_CHUNK_ROWS):
+    """Builds the cleaned columnar dataset for `raw_path` if it is not cached yet. Returns the cache folder."""
+    key = file_hash(raw_path)
+    out_dir = os.path.join(cache_dir, key[:16])
+    if os.path.exists(os.path.join(out_dir, "meta.json")):
+        logging.debug(f"Using cached dataset at {out_dir}")
+        return out_dir
+
+    logging.info(f"Preparing dataset from {raw_path} into {out_dir}")
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    staging_dir = os.path.join(tmp_dir, "staging")
+    os.makedirs(staging_dir)
+
+    # 1. Parse the CSV once into compact flat columns
+    staged = stage_columns(raw_path, staging_dir, chunk_rows)
+    n_rows = len(staged["price"])
+
+    # 2. IQR bounds on price, repeated until stable
+    (lower, upper), rounds = iqr_bounds(staged["price"], chunk_rows)
+
+    # 3. Keep the rows inside the bounds
+    n_kept = write_filtered(staged, n_rows, lower, upper, tmp_dir, chunk_rows)
+    del staged
+    shutil.rmtree(staging_dir)
+
+    meta = {
+        "source": raw_path,
+        "sha256": key,
+        "pipeline_version": PIPELINE_VERSION,
+        "rows_raw": n_rows,
+        "rows": n_kept,
+        "price_bounds": [lower, upper],
+        "iqr_rounds": rounds,
+        "columns": COLUMN_DTYPES,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    # Publish the finished cache in one step so an interrupted run is never mistaken for a hit
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    logging.info(f"Kept {n_kept} of {n_rows} rows (price within [{lower:.0f}, {upper:.0f}])")
+    return out_dir
+
+
+def load_dataset(raw_path=Config.RAW_DATA_PATH, cache_dir=Config.DATA_CACHE_DIR):
+    """Returns the cleaned dataset as a DataFrame, building the cache first if needed."""
+    out_dir = prepare_dataset(raw_path, cache_dir)
+    return pd.DataFrame({col: np.load(os.path.join(out_dir, f"{col}.npy"), mmap_mode="r") for col in COLUMN_DTYPES})
+
+
+def export_csv(out_dir, csv_path=Config.PROCESSED_DATA_PATH, chunk_rows=Config.DATA_CHUNK_ROWS):
+    """Writes a cached dataset back out as CSV, chunk by chunk."""
+    columns = {col: np.load(os.path.join(out_dir, f"{col}.npy"), mmap_mode="r") for col in COLUMN_DTYPES}
+    n_rows = len(columns["price"])
+    with open(csv_path, "w", newline="") as f:
+        for i, rows in enumerate(iter_slices(n_rows, chunk_rows)):
+            chunk = pd.DataFrame({col: values[rows] for col, values in columns.items()})
+            chunk.to_csv(f, header=(i == 0), index=False)
+    logging.info(f"Exported {n_rows} rows to {csv_path}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Clean the raw housing data into the columnar training cache.")
+    parser.add_argument("--raw", default=Config.RAW_DATA_PATH, help="Raw CSV to clean")
+    parser.add_argument("--export-csv", action="store_true", help=f"Also write the result to {Config.PROCESSED_DATA_PATH}")
+    args = parser.parse_args()
+
+    out_dir = prepare_dataset(args.raw)
+    print(f"Cleaned dataset cached at {out_dir}")
+    if args.export_csv:
+        export_csv(out_dir)
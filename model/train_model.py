@@ -7,6 +7,11 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder, PolynomialFeatures
 from sklearn.metrics import mean_absolute_error, r2_score 
 import joblib
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Project root, for `python model/train_model.py`
+from model.preprocess import load_dataset
 
 # Check if the model already exists, if so, skip training
 model_save_path = 'model/saved_model/model.pkl'
@@ -20,9 +25,8 @@ try:
     poly = joblib.load(poly_save_path)
     print(f"Model, Encoder, and Poly transformer loaded from {model_save_path}")
 except FileNotFoundError:
-    # 2. Load the dataset
-    data_path = 'data/processed/cleaned_dataset_iqr.csv'
-    df = pd.read_csv(data_path)
+    # 2. Load the cleaned dataset (built from data/raw by model/preprocess.py, cached until the raw file changes)
+    df = load_dataset()
 
     # 3. Preprocessing
     features = ["sqft_living", "no_of_bedrooms", "no_of_bathrooms", "sqft_lot", "no_of_floors", "house_age", "zipcode"]